@@ -1,4 +1,6 @@
 import anthropic
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 
 class AIGenerator:
@@ -40,9 +42,21 @@ All responses must be:
 Provide only the direct answer to what was asked.
 """
     
-    def __init__(self, api_key: str, model: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    def __init__(self, api_key: str, model: str, max_tool_rounds: int = 2):
+        # Persistent pooled HTTP client so follow-up tool rounds reuse the open connection
+        self._http_client = anthropic.DefaultHttpxClient(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=60)
+        )
+        # Short connect timeout and bounded retries so an unreachable API fails fast
+        # instead of holding the request for the SDK's 10 minute default
+        self.client = anthropic.Anthropic(
+            api_key=api_key,
+            http_client=self._http_client,
+            max_retries=3,
+            timeout=httpx.Timeout(60.0, connect=3.0, read=60.0, write=10.0, pool=5.0)
+        )
         self.model = model
+        self.max_tool_rounds = max_tool_rounds
         
         # Pre-build base API parameters
         self.base_params = {
@@ -50,7 +64,23 @@ Provide only the direct answer to what was asked.
             "temperature": 0,
             "max_tokens": 800
         }
-    
+
+        # Static system block marked for prompt caching, built once so the cached
+        # prefix is byte-identical on every call
+        self._system_block = {
+            "type": "text",
+            "text": self.SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"}
+        }
+        self._system_history_prefix = "Previous conversation:\n"
+
+        # Per-call parameter templates, copied rather than rebuilt with ** merges
+        self._api_template_no_tools = dict(self.base_params)
+        self._api_template_tools = {**self.base_params, "tool_choice": {"type": "auto"}}
+
+        # Worker pool for running multiple tool calls from one response concurrently
+        self._tool_executor = ThreadPoolExecutor(max_workers=4)
+
     def generate_response(self, query: str,
                          conversation_history: Optional[str] = None,
                          tools: Optional[List] = None,
@@ -68,24 +98,27 @@ Provide only the direct answer to what was asked.
             Generated response as string
         """
         
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history 
-            else self.SYSTEM_PROMPT
-        )
+        # Build system blocks - conversation history goes in a separate uncached
+        # block after the cached static prompt
+        if conversation_history:
+            system_content = [
+                self._system_block,
+                {"type": "text", "text": self._system_history_prefix + conversation_history}
+            ]
+        else:
+            system_content = [self._system_block]
         
-        # Prepare API call parameters efficiently
-        api_params = {
-            **self.base_params,
-            "messages": [{"role": "user", "content": query}],
-            "system": system_content
-        }
-        
-        # Add tools if available
+        # Prepare API call parameters from the matching template
         if tools:
-            api_params["tools"] = tools
-            api_params["tool_choice"] = {"type": "auto"}
+            # Mark the last tool so the tool schemas are part of the cached prefix
+            tools_with_cache = list(tools)
+            tools_with_cache[-1] = {**tools_with_cache[-1], "cache_control": {"type": "ephemeral"}}
+            api_params = self._api_template_tools.copy()
+            api_params["tools"] = tools_with_cache
+        else:
+            api_params = self._api_template_no_tools.copy()
+        api_params["messages"] = [{"role": "user", "content": query}]
+        api_params["system"] = system_content
         
         # Get response from Claude
         response = self.client.messages.create(**api_params)
@@ -100,7 +133,7 @@ Provide only the direct answer to what was asked.
     def _handle_tool_execution(self, initial_response, base_params: Dict[str, Any], tool_manager):
         """
         Handle execution of tool calls with support for sequential tool calling.
-        Supports up to MAX_TOOL_ROUNDS (2) rounds of tool use.
+        Supports up to max_tool_rounds rounds of tool use.
 
         Args:
             initial_response: The response containing tool use requests
@@ -110,82 +143,122 @@ Provide only the direct answer to what was asked.
         Returns:
             Final response text after all tool executions
         """
-        from config import config
-
-        MAX_TOOL_ROUNDS = config.MAX_TOOL_ROUNDS
+        max_tool_rounds = self.max_tool_rounds
+        execute_tool = tool_manager.execute_tool
+        execute_tool_with_sources = tool_manager.execute_tool_with_sources
         current_round = 1  # Initial response counts as round 1
 
         # Start with existing messages from base_params
-        messages = base_params["messages"].copy()
+        messages = list(base_params["messages"])
+        append_message = messages.append
 
         # Add AI's initial tool use response
-        messages.append({"role": "assistant", "content": initial_response.content})
+        append_message({"role": "assistant", "content": initial_response.content})
 
         current_response = initial_response
 
         # Iterative loop: Continue while tools are being used and under round limit
-        while current_response.stop_reason == "tool_use" and current_round <= MAX_TOOL_ROUNDS:
+        while current_response.stop_reason == "tool_use" and current_round <= max_tool_rounds:
+            # Pick out the tool calls once; nothing to run means nothing to send back
+            tool_blocks = [block for block in current_response.content if block.type == "tool_use"]
+            if not tool_blocks:
+                break
+
             # Execute all tool calls in current response
-            tool_results = []
-            for content_block in current_response.content:
-                if content_block.type == "tool_use":
-                    try:
-                        tool_result = tool_manager.execute_tool(
-                            content_block.name,
-                            **content_block.input
-                        )
-
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": tool_result
-                        })
-                    except Exception as e:
-                        # Handle tool execution errors gracefully
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": f"Error executing tool: {str(e)}",
-                            "is_error": True
-                        })
+            if len(tool_blocks) > 1:
+                # Run independent tool calls concurrently without touching the shared
+                # source state; map() keeps outcomes in block order, so sources are
+                # merged in that order rather than by which call finished last
+                outcomes = list(self._tool_executor.map(
+                    lambda block: self._run_tool_collecting_sources(block, execute_tool_with_sources),
+                    tool_blocks
+                ))
+                tool_results = [tool_result for tool_result, _ in outcomes]
+                tool_manager.record_sources([source for _, sources in outcomes for source in sources])
+            else:
+                tool_results = [self._run_tool(tool_blocks[0], execute_tool)]
 
             # Add tool results as user message
-            if tool_results:
-                messages.append({"role": "user", "content": tool_results})
+            append_message({"role": "user", "content": tool_results})
+
+            follow_up_params = self._api_template_no_tools.copy()
+            follow_up_params["messages"] = messages
+            follow_up_params["system"] = base_params["system"]
 
             # Decide whether to include tools in next API call
-            # CRITICAL: Keep tools available if under round limit
-            if current_round < MAX_TOOL_ROUNDS:
-                # Keep tools available for potential next round
-                follow_up_params = {
-                    **self.base_params,
-                    "messages": messages,
-                    "system": base_params["system"],
-                    "tools": base_params["tools"],
-                    "tool_choice": {"type": "auto"}
-                }
-            else:
-                # Final round: Remove tools to force text response
-                follow_up_params = {
-                    **self.base_params,
-                    "messages": messages,
-                    "system": base_params["system"]
-                }
+            # CRITICAL: Keep tools available if under round limit; on the final
+            # round they are left out to force a text response
+            if current_round < max_tool_rounds:
+                follow_up_params["tools"] = base_params["tools"]
+                follow_up_params["tool_choice"] = base_params["tool_choice"]
 
             # Make follow-up API call
             current_response = self.client.messages.create(**follow_up_params)
 
             # If Claude used tools, add assistant response and continue loop
             if current_response.stop_reason == "tool_use":
-                messages.append({"role": "assistant", "content": current_response.content})
+                append_message({"role": "assistant", "content": current_response.content})
                 current_round += 1
             # else: Claude provided text response, loop will exit
 
-        # Extract final text response
-        # Handle case where response has text content
-        for content_block in current_response.content:
-            if hasattr(content_block, 'text'):
-                return content_block.text
+        # Extract final text response, falling back if no text block was returned
+        return next(
+            (block.text for block in current_response.content if getattr(block, "type", None) == "text"),
+            "Unable to generate response."
+        )
+
+    def close(self):
+        """Release the HTTP connection pool and tool worker threads"""
+        self._http_client.close()
+        self._tool_executor.shutdown(wait=False)
+
+    def _run_tool_collecting_sources(self, content_block, execute_tool_with_sources):
+        """
+        Execute a single tool_use block, keeping the sources it produced local to this call.
+
+        Args:
+            content_block: The tool_use block from Claude's response
+            execute_tool_with_sources: Bound ToolManager.execute_tool_with_sources
+
+        Returns:
+            Tuple of (tool_result content block, sources produced by the call)
+        """
+        sources = []
+
+        def execute_tool(tool_name, **kwargs):
+            result, call_sources = execute_tool_with_sources(tool_name, **kwargs)
+            sources.extend(call_sources)
+            return result
+
+        return self._run_tool(content_block, execute_tool), sources
+
+    def _run_tool(self, content_block, execute_tool) -> Dict[str, Any]:
+        """
+        Execute a single tool_use block and build its tool_result.
+
+        Args:
+            content_block: The tool_use block from Claude's response
+            execute_tool: Bound ToolManager.execute_tool
+
+        Returns:
+            tool_result content block for the follow-up message
+        """
+        try:
+            tool_result = execute_tool(
+                content_block.name,
+                **content_block.input
+            )
 
-        # Fallback if no text found
-        return "Unable to generate response."
\ No newline at end of file
+            return {
+                "type": "tool_result",
+                "tool_use_id": content_block.id,
+                "content": tool_result
+            }
+        except Exception as e:
+            # Handle tool execution errors gracefully
+            return {
+                "type": "tool_result",
+                "tool_use_id": content_block.id,
+                "content": f"Error executing tool: {str(e)}",
+                "is_error": True
+            }
\ No newline at end of file
@@ -5,9 +5,11 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
 import os
+import anthropic
 
 from config import config
 from rag_system import RAGSystem
@@ -67,14 +69,21 @@ async def query_documents(request: QueryRequest):
         if not session_id:
             session_id = rag_system.session_manager.create_session()
         
-        # Process query using RAG system
-        answer, sources = rag_system.query(request.query, session_id)
+        # Process query using RAG system off the event loop so other requests stay responsive
+        answer, sources = await run_in_threadpool(rag_system.query, request.query, session_id)
         
         return QueryResponse(
             answer=answer,
             sources=sources,
             session_id=session_id
         )
+    except anthropic.APIStatusError as e:
+        # Server-side API errors are only raised once retries are exhausted
+        if e.status_code >= 500:
+            raise HTTPException(status_code=503, detail="The AI service is temporarily unavailable. Please try again shortly.")
+        raise HTTPException(status_code=500, detail=str(e))
+    except anthropic.APIConnectionError:
+        raise HTTPException(status_code=503, detail="The AI service could not be reached. Please try again shortly.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -102,6 +111,11 @@ async def startup_event():
         except Exception as e:
             print(f"Error loading documents: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled API connections on shutdown"""
+    rag_system.ai_generator.close()
+
 # Custom static file handler with no-cache headers for development
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -20,6 +20,7 @@ class Config:
     CHUNK_OVERLAP: int = 100     # Characters to overlap between chunks
     MAX_RESULTS: int = 5         # Maximum search results to return
     MAX_HISTORY: int = 2         # Number of conversation messages to remember
+    RESPONSE_CACHE_SIZE: int = 512  # Maximum cached query responses (LRU)
 
     # Tool calling settings
     MAX_TOOL_ROUNDS: int = 2     # Maximum sequential tool calling rounds
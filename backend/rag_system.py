@@ -1,5 +1,9 @@
 from typing import List, Tuple, Optional, Dict
+from collections import OrderedDict
+import hashlib
 import os
+import threading
+from concurrent.futures import Future
 from document_processor import DocumentProcessor
 from vector_store import VectorStore
 from ai_generator import AIGenerator
@@ -16,15 +20,31 @@ class RAGSystem:
         # Initialize core components
         self.document_processor = DocumentProcessor(config.CHUNK_SIZE, config.CHUNK_OVERLAP)
         self.vector_store = VectorStore(config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS)
-        self.ai_generator = AIGenerator(config.ANTHROPIC_API_KEY, config.ANTHROPIC_MODEL)
+        self.ai_generator = AIGenerator(config.ANTHROPIC_API_KEY, config.ANTHROPIC_MODEL, config.MAX_TOOL_ROUNDS)
         self.session_manager = SessionManager(config.MAX_HISTORY)
-        
-        # Initialize search tools
-        self.tool_manager = ToolManager()
-        self.search_tool = CourseSearchTool(self.vector_store)
-        self.outline_tool = CourseOutlineTool(self.vector_store)
-        self.tool_manager.register_tool(self.search_tool)
-        self.tool_manager.register_tool(self.outline_tool)
+
+        # Guards the response cache, in-flight table and session history; never
+        # held across an API call, so queries from the request thread pool overlap
+        self._lock = threading.Lock()
+
+        # LRU cache of (response, sources) keyed by query + conversation history
+        self.response_cache: OrderedDict = OrderedDict()
+        self.response_cache_size = config.RESPONSE_CACHE_SIZE
+
+        # Futures for responses being generated, so identical concurrent queries
+        # wait for the first one instead of calling the API again
+        self._pending: Dict[str, Future] = {}
+
+        # Bumped whenever the cache is invalidated, so a response generated
+        # before the invalidation is not cached after it
+        self._cache_generation = 0
+    
+    def _create_tool_manager(self) -> ToolManager:
+        """Build a ToolManager with its own search tools, so each query tracks its own sources"""
+        tool_manager = ToolManager()
+        tool_manager.register_tool(CourseSearchTool(self.vector_store))
+        tool_manager.register_tool(CourseOutlineTool(self.vector_store))
+        return tool_manager
     
     def add_course_document(self, file_path: str) -> Tuple[Course, int]:
         """
@@ -45,6 +65,9 @@ class RAGSystem:
             
             # Add course content chunks to vector store
             self.vector_store.add_course_content(course_chunks)
+
+            # Cached answers may not reflect the new content
+            self._invalidate_cache()
             
             return course, len(course_chunks)
         except Exception as e:
@@ -69,6 +92,8 @@ class RAGSystem:
         if clear_existing:
             print("Clearing existing data for fresh rebuild...")
             self.vector_store.clear_all_data()
+            # Cached answers may refer to content that no longer exists
+            self._invalidate_cache()
         
         if not os.path.exists(folder_path):
             print(f"Folder {folder_path} does not exist")
@@ -98,6 +123,10 @@ class RAGSystem:
                         print(f"Course already exists: {course.title} - skipping")
                 except Exception as e:
                     print(f"Error processing {file_name}: {e}")
+
+        # Cached answers may not reflect newly added courses
+        if total_courses:
+            self._invalidate_cache()
         
         return total_courses, total_chunks
     
@@ -118,29 +147,94 @@ class RAGSystem:
         # Get conversation history if session exists
         history = None
         if session_id:
-            history = self.session_manager.get_conversation_history(session_id)
-        
-        # Generate response using AI with tools
-        response = self.ai_generator.generate_response(
-            query=prompt,
-            conversation_history=history,
-            tools=self.tool_manager.get_tool_definitions(),
-            tool_manager=self.tool_manager
-        )
-        
-        # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
+            with self._lock:
+                history = self.session_manager.get_conversation_history(session_id)
+
+        response, sources = self._cached_or_generate(self._cache_key(query, history), prompt, history)
 
-        # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
-        
         # Update conversation history
         if session_id:
-            self.session_manager.add_exchange(session_id, query, response)
+            with self._lock:
+                self.session_manager.add_exchange(session_id, query, response)
         
         # Return response with sources from tool searches
         return response, sources
     
+    def _cached_or_generate(self, cache_key: str, prompt: str, history: Optional[str]) -> Tuple[str, List]:
+        """Serve a repeated question from the cache, or generate it once for all concurrent askers"""
+        with self._lock:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self.response_cache.move_to_end(cache_key)
+                return cached
+            pending = self._pending.get(cache_key)
+            if pending is None:
+                pending = self._pending[cache_key] = Future()
+                generation = self._cache_generation
+                is_owner = True
+            else:
+                is_owner = False
+
+        # Another thread is already generating this response
+        if not is_owner:
+            return pending.result()
+
+        try:
+            # Per-query tool manager, so concurrent queries never mix their sources
+            tool_manager = self._create_tool_manager()
+
+            # Generate response using AI with tools
+            response = self.ai_generator.generate_response(
+                query=prompt,
+                conversation_history=history,
+                tools=tool_manager.get_tool_definitions(),
+                tool_manager=tool_manager
+            )
+
+            # Get sources from the search tool
+            sources = tool_manager.get_last_sources()
+
+            # An answer built on a failed search would outlive the failure
+            cacheable = not tool_manager.has_errors()
+
+            # Reset sources after retrieving them
+            tool_manager.reset_sources()
+        except BaseException as e:
+            with self._lock:
+                self._release_pending(cache_key, pending)
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            if cacheable and generation == self._cache_generation:
+                self._cache_response(cache_key, response, sources)
+            self._release_pending(cache_key, pending)
+        pending.set_result((response, sources))
+        return response, sources
+
+    def _invalidate_cache(self):
+        """Drop cached responses and keep responses already being generated out of the cache"""
+        with self._lock:
+            self.response_cache.clear()
+            # Later queries generate afresh rather than wait on a response started before now
+            self._pending.clear()
+            self._cache_generation += 1
+
+    def _release_pending(self, cache_key: str, pending: Future):
+        """Remove a finished future from the in-flight table unless an invalidation already dropped it"""
+        if self._pending.get(cache_key) is pending:
+            del self._pending[cache_key]
+
+    def _cache_key(self, query: str, history: Optional[str]) -> str:
+        """Build a compact cache key from the query and conversation history"""
+        return hashlib.blake2b(f"{query}\0{history or ''}".encode(), digest_size=16).hexdigest()
+
+    def _cache_response(self, cache_key: str, response: str, sources: List):
+        """Store a response, evicting the least recently used entry when full"""
+        self.response_cache[cache_key] = (response, sources)
+        if len(self.response_cache) > self.response_cache_size:
+            self.response_cache.popitem(last=False)
+    
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
         return {
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, Protocol
+from typing import Dict, Any, List, Optional, Protocol, Tuple
 from abc import ABC, abstractmethod
 from vector_store import VectorStore, SearchResults
 
@@ -23,6 +23,7 @@ class CourseSearchTool(Tool):
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
         self.last_sources = []  # Track sources from last search
+        self.had_error = False  # Set once a search fails, so answers built on it aren't cached
     
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
@@ -61,7 +62,22 @@ class CourseSearchTool(Tool):
         Returns:
             Formatted search results or error message
         """
-        
+        result, sources = self.execute_with_sources(query, course_name, lesson_number)
+
+        # Store sources for retrieval
+        if sources:
+            self.last_sources = sources
+
+        return result
+
+    def execute_with_sources(self, query: str, course_name: Optional[str] = None,
+                             lesson_number: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Execute the search without touching last_sources, so concurrent calls don't interfere.
+
+        Returns:
+            Tuple of (formatted search results or error message, sources for the UI)
+        """
         # Use the vector store's unified search interface
         results = self.store.search(
             query=query,
@@ -71,7 +87,8 @@ class CourseSearchTool(Tool):
         
         # Handle errors
         if results.error:
-            return results.error
+            self.had_error = True
+            return results.error, []
         
         # Handle empty results
         if results.is_empty():
@@ -80,12 +97,12 @@ class CourseSearchTool(Tool):
                 filter_info += f" in course '{course_name}'"
             if lesson_number:
                 filter_info += f" in lesson {lesson_number}"
-            return f"No relevant content found{filter_info}."
+            return f"No relevant content found{filter_info}.", []
         
         # Format and return results
         return self._format_results(results)
     
-    def _format_results(self, results: SearchResults) -> str:
+    def _format_results(self, results: SearchResults) -> Tuple[str, List[Dict[str, Any]]]:
         """Format search results with course and lesson context"""
         formatted = []
         sources = []  # Track sources for the UI
@@ -119,10 +136,7 @@ class CourseSearchTool(Tool):
 
             formatted.append(f"{header}\n{doc}")
 
-        # Store sources for retrieval
-        self.last_sources = sources
-
-        return "\n\n".join(formatted)
+        return "\n\n".join(formatted), sources
 
 
 class CourseOutlineTool(Tool):
@@ -130,6 +144,7 @@ class CourseOutlineTool(Tool):
 
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
+        self.had_error = False  # Set once a lookup fails, so answers built on it aren't cached
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
@@ -196,6 +211,7 @@ class CourseOutlineTool(Tool):
             return outline
 
         except Exception as e:
+            self.had_error = True
             return f"Error retrieving course outline: {str(e)}"
 
 
@@ -204,6 +220,8 @@ class ToolManager:
     
     def __init__(self):
         self.tools = {}
+        self.last_sources = []  # Sources from the most recent tool call that produced any
+        self.had_error = False  # Set once a tool call raises
     
     def register_tool(self, tool: Tool):
         """Register any tool that implements the Tool interface"""
@@ -220,21 +238,48 @@ class ToolManager:
     
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
+        result, sources = self.execute_tool_with_sources(tool_name, **kwargs)
+        self.record_sources(sources)
+        return result
+
+    def execute_tool_with_sources(self, tool_name: str, **kwargs) -> Tuple[str, list]:
+        """
+        Execute a tool by name without recording its sources.
+
+        Safe to call from several threads at once; pass the returned sources
+        to record_sources() once the calls have finished.
+
+        Returns:
+            Tuple of (tool result, sources the call produced)
+        """
         if tool_name not in self.tools:
-            return f"Tool '{tool_name}' not found"
-        
-        return self.tools[tool_name].execute(**kwargs)
+            return f"Tool '{tool_name}' not found", []
+
+        tool = self.tools[tool_name]
+        try:
+            if hasattr(tool, 'execute_with_sources'):
+                return tool.execute_with_sources(**kwargs)
+            return tool.execute(**kwargs), []
+        except Exception:
+            self.had_error = True
+            raise
+
+    def record_sources(self, sources: list):
+        """Record sources as the last sources, ignoring calls that found none"""
+        if sources:
+            self.last_sources = sources
     
+    def has_errors(self) -> bool:
+        """Whether any tool call raised or reported a failed lookup"""
+        return self.had_error or any(getattr(tool, 'had_error', False) for tool in self.tools.values())
+
     def get_last_sources(self) -> list:
         """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
-        for tool in self.tools.values():
-            if hasattr(tool, 'last_sources') and tool.last_sources:
-                return tool.last_sources
-        return []
+        return self.last_sources
 
     def reset_sources(self):
-        """Reset sources from all tools that track sources"""
+        """Reset sources from the manager and all tools that track sources"""
+        self.last_sources = []
         for tool in self.tools.values():
             if hasattr(tool, 'last_sources'):
                 tool.last_sources = []
\ No newline at end of file
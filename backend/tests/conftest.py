@@ -0,0 +1,68 @@
+"""
+Shared pytest fixtures for the backend test suite
+"""
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+
+# Collaborators RAGSystem builds in __init__, replaced so no real store or client is created
+_RAG_SYSTEM_DEPENDENCIES = (
+    'DocumentProcessor', 'VectorStore', 'AIGenerator', 'SessionManager',
+    'ToolManager', 'CourseSearchTool', 'CourseOutlineTool'
+)
+
+
+@pytest.fixture(scope="session")
+def mock_config(tmp_path_factory):
+    """Config for RAGSystem, built once per session; tests must not modify it"""
+    # Plain attribute bag: nothing asserts on the config, and a missing setting
+    # raises AttributeError instead of silently returning a Mock
+    return SimpleNamespace(
+        CHUNK_SIZE=800,
+        CHUNK_OVERLAP=100,
+        # Per-session (and per xdist worker) directory so parallel runs never share a store
+        CHROMA_PATH=str(tmp_path_factory.mktemp("chroma")),
+        EMBEDDING_MODEL="test-model",
+        MAX_RESULTS=5,
+        ANTHROPIC_API_KEY="test-key",
+        ANTHROPIC_MODEL="test-model",
+        MAX_HISTORY=2,
+        MAX_TOOL_ROUNDS=2,
+        RESPONSE_CACHE_SIZE=2
+    )
+
+
+@pytest.fixture(scope="module")
+def rag_system_module():
+    """rag_system module with its dependencies patched once for the whole test module"""
+    # Imported here so collecting tests doesn't pull in the full rag_system import chain
+    import rag_system
+
+    with ExitStack() as patches:
+        for name in _RAG_SYSTEM_DEPENDENCIES:
+            patches.enter_context(patch.object(rag_system, name))
+        yield rag_system
+
+
+@pytest.fixture
+def tool_manager(rag_system_module):
+    """ToolManager that queries in the test build, fresh per test"""
+    tool_manager = Mock(get_last_sources=Mock(return_value=[]), has_errors=Mock(return_value=False))
+    rag_system_module.ToolManager.reset_mock(return_value=True, side_effect=True)
+    rag_system_module.ToolManager.return_value = tool_manager
+    return tool_manager
+
+
+@pytest.fixture
+def rag_system(mock_config, rag_system_module, tool_manager):
+    """RAGSystem with mocked collaborators, new per test so the response cache is isolated"""
+    rag = rag_system_module.RAGSystem(mock_config)
+
+    # Replace with fresh mocks for testing
+    rag.ai_generator = Mock()
+    rag.session_manager = Mock()
+
+    return rag
@@ -1,21 +1,28 @@
 """
 Shared mock data and fixtures for testing the RAG system
 """
-import sys
-import os
-from unittest.mock import Mock
-
-# Add parent directory to path to import backend modules
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import functools
+import itertools
+from types import SimpleNamespace
 
 from vector_store import SearchResults
 from models import Course, Lesson, CourseChunk
 
+# Monotonic source of unique tool_use ids for custom tool responses
+_tool_id_counter = itertools.count()
+
 
 class MockFixtures:
-    """Factory class for creating consistent mock objects across tests"""
+    """
+    Factory class for creating consistent mock objects across tests.
+
+    Factories are cached, so repeated calls with the same arguments return the
+    same shared object. Tests must not mutate returned fixtures; call
+    reset_fixture_cache() if a test has to.
+    """
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_sample_search_results():
         """Create sample SearchResults for testing"""
         return SearchResults(
@@ -33,16 +40,19 @@ class MockFixtures:
         )
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_empty_search_results():
         """Create empty SearchResults"""
         return SearchResults(documents=[], metadata=[], distances=[])
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_error_search_results(error_msg):
         """Create SearchResults with error"""
         return SearchResults.empty(error_msg)
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_sample_course():
         """Create sample Course object"""
         return Course(
@@ -57,42 +67,37 @@ class MockFixtures:
         )
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_anthropic_response_no_tool():
         """Mock Anthropic response without tool use"""
-        response = Mock()
-        response.stop_reason = "end_turn"
-        text_block = Mock()
-        text_block.text = "This is a direct answer without using tools."
-        response.content = [text_block]
-        return response
+        return SimpleNamespace(
+            stop_reason="end_turn",
+            content=[SimpleNamespace(type="text", text="This is a direct answer without using tools.")]
+        )
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_anthropic_response_with_tool(tool_name="search_course_content", query="test query"):
         """Mock Anthropic response with tool use"""
-        response = Mock()
-        response.stop_reason = "tool_use"
-
-        # Create tool use block
-        tool_block = Mock()
-        tool_block.type = "tool_use"
-        tool_block.name = tool_name
-        tool_block.input = {"query": query}
-        tool_block.id = "toolu_test123"
-
-        response.content = [tool_block]
-        return response
+        tool_block = SimpleNamespace(
+            type="tool_use",
+            name=tool_name,
+            input={"query": query},
+            id="toolu_test123"
+        )
+        return SimpleNamespace(stop_reason="tool_use", content=[tool_block])
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_anthropic_final_response(text="This is the synthesized answer based on search results."):
         """Mock Anthropic final response after tool execution"""
-        response = Mock()
-        response.stop_reason = "end_turn"
-        text_block = Mock()
-        text_block.text = text
-        response.content = [text_block]
-        return response
+        return SimpleNamespace(
+            stop_reason="end_turn",
+            content=[SimpleNamespace(type="text", text=text)]
+        )
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_sample_course_chunks():
         """Create sample CourseChunk objects"""
         return [
@@ -122,12 +127,18 @@ class MockFixtures:
         Returns:
             Mock response object with tool_use stop_reason
         """
-        response = Mock()
-        response.stop_reason = "tool_use"
-        tool_block = Mock()
-        tool_block.type = "tool_use"
-        tool_block.name = tool_name
-        tool_block.input = tool_params
-        tool_block.id = f"toolu_{tool_name}_{hash(frozenset(tool_params.items())) % 10000}"
-        response.content = [tool_block]
-        return response
+        tool_block = SimpleNamespace(
+            type="tool_use",
+            name=tool_name,
+            input=tool_params,
+            id=f"toolu_{tool_name}_{next(_tool_id_counter)}"
+        )
+        return SimpleNamespace(stop_reason="tool_use", content=[tool_block])
+
+
+def reset_fixture_cache():
+    """Clear all cached MockFixtures factories so the next call builds fresh objects"""
+    for attr in vars(MockFixtures).values():
+        factory = getattr(attr, '__func__', attr)
+        if hasattr(factory, 'cache_clear'):
+            factory.cache_clear()
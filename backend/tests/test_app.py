@@ -0,0 +1,73 @@
+"""
+API tests for the FastAPI endpoints
+
+Tests cover:
+- Mapping of Anthropic API failures to HTTP status codes
+"""
+from pathlib import Path
+from unittest.mock import patch
+
+import anthropic
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+# Keep these tests on one worker under pytest-xdist --dist loadgroup
+pytestmark = pytest.mark.xdist_group("app")
+
+_API_REQUEST = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    """app module imported with RAGSystem patched, from backend/ so the frontend mount resolves"""
+    with pytest.MonkeyPatch.context() as monkeypatch, patch('rag_system.RAGSystem'):
+        monkeypatch.chdir(Path(__file__).resolve().parents[1])
+        import app
+        yield app
+
+
+@pytest.fixture
+def client(app_module):
+    """Test client without startup events, so no documents are loaded"""
+    app_module.rag_system.query.reset_mock(side_effect=True)
+    return TestClient(app_module.app)
+
+
+@pytest.mark.parametrize("error, expected_detail", [
+    (
+        anthropic.InternalServerError("Overloaded", response=httpx.Response(529, request=_API_REQUEST), body=None),
+        "The AI service is temporarily unavailable. Please try again shortly."
+    ),
+    (
+        anthropic.APIConnectionError(request=_API_REQUEST),
+        "The AI service could not be reached. Please try again shortly."
+    ),
+])
+def test_query_api_unavailable_returns_503(client, app_module, error, expected_detail):
+    """Test that server-side and connection failures from the API map to 503"""
+    # Arrange
+    app_module.rag_system.query.side_effect = error
+
+    # Act
+    response = client.post("/api/query", json={"query": "What is MCP?", "session_id": "session_1"})
+
+    # Assert
+    assert response.status_code == 503
+    assert response.json() == {"detail": expected_detail}
+
+
+def test_query_api_client_error_returns_500(client, app_module):
+    """Test that a 4xx API error is not reported as a temporary outage"""
+    # Arrange
+    app_module.rag_system.query.side_effect = anthropic.BadRequestError(
+        "Invalid request", response=httpx.Response(400, request=_API_REQUEST), body=None
+    )
+
+    # Act
+    response = client.post("/api/query", json={"query": "What is MCP?", "session_id": "session_1"})
+
+    # Assert
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Invalid request"}
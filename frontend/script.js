@@ -76,7 +76,10 @@ async function sendMessage() {
             })
         });
 
-        if (!response.ok) throw new Error('Query failed');
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({}));
+            throw new Error(response.status === 503 && error.detail ? error.detail : 'Query failed');
+        }
 
         const data = await response.json();
         